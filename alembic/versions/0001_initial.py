@@ -0,0 +1,62 @@
+"""Начальная схема: отзывы и результаты анализа
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-15
+"""
+from alembic import context, op
+import sqlalchemy as sa
+
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # База, созданная до миграций через Base.metadata.create_all, уже
+    # содержит обе таблицы: ревизия только отмечается применённой
+    if not context.is_offline_mode() and sa.inspect(op.get_bind()).has_table('reviews'):
+        return
+    
+    op.create_table(
+        'reviews',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('is_deleted', sa.Boolean(), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.Column('uuid', sa.String(length=36), nullable=True),
+        sa.Column('text', sa.Text(), nullable=False),
+        sa.Column('source', sa.String(length=100), nullable=True),
+        sa.Column('language', sa.String(length=10), nullable=True),
+        sa.Column('timestamp', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_reviews_id', 'reviews', ['id'])
+    op.create_index('ix_reviews_uuid', 'reviews', ['uuid'], unique=True)
+    
+    op.create_table(
+        'analysis_results',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=True),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+        sa.Column('is_deleted', sa.Boolean(), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=True),
+        sa.Column('review_id', sa.Integer(), nullable=False),
+        sa.Column('sentiment', sa.String(length=20), nullable=False),
+        sa.Column('confidence', sa.Float(), nullable=False),
+        sa.Column('aspects', sa.JSON(), nullable=True),
+        sa.Column('key_phrases', sa.JSON(), nullable=True),
+        sa.Column('emotion_intensity', sa.JSON(), nullable=True),
+        sa.Column('processed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['review_id'], ['reviews.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_analysis_results_id', 'analysis_results', ['id'])
+
+def downgrade():
+    op.drop_index('ix_analysis_results_id', table_name='analysis_results')
+    op.drop_table('analysis_results')
+    op.drop_index('ix_reviews_uuid', table_name='reviews')
+    op.drop_index('ix_reviews_id', table_name='reviews')
+    op.drop_table('reviews')
@@ -0,0 +1,55 @@
+"""Обязательный флаг is_deleted и частичные индексы по активным записям
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-15
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+TABLES = ('reviews', 'analysis_results')
+
+def upgrade():
+    for table in TABLES:
+        op.execute(f"UPDATE {table} SET is_deleted = false WHERE is_deleted IS NULL")
+        op.alter_column(
+            table,
+            'is_deleted',
+            existing_type=sa.Boolean(),
+            nullable=False,
+            server_default=sa.false(),
+        )
+    
+    # Индексы уже есть, если схема создана create_all по текущим моделям
+    op.create_index(
+        'ix_reviews_active',
+        'reviews',
+        ['id'],
+        postgresql_where=sa.text('is_deleted = false'),
+        if_not_exists=True,
+    )
+    op.create_index(
+        'ix_analysis_results_active',
+        'analysis_results',
+        ['review_id'],
+        postgresql_where=sa.text('is_deleted = false'),
+        if_not_exists=True,
+    )
+
+def downgrade():
+    op.drop_index('ix_analysis_results_active', table_name='analysis_results')
+    op.drop_index('ix_reviews_active', table_name='reviews')
+    
+    for table in TABLES:
+        op.alter_column(
+            table,
+            'is_deleted',
+            existing_type=sa.Boolean(),
+            nullable=True,
+            server_default=None,
+        )
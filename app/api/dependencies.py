@@ -0,0 +1,10 @@
+"""
+Общие зависимости FastAPI
+"""
+from fastapi import Request
+
+from app.services.analysis import ReviewAnalyzer
+
+def get_review_analyzer(request: Request) -> ReviewAnalyzer:
+    """Анализатор, загруженный при старте приложения"""
+    return request.app.state.review_analyzer
@@ -0,0 +1,6 @@
+"""
+Эндпоинты аналитики по отзывам
+"""
+from fastapi import APIRouter
+
+router = APIRouter()
@@ -0,0 +1,6 @@
+"""
+Эндпоинты для пакетной обработки отзывов
+"""
+from fastapi import APIRouter
+
+router = APIRouter()
@@ -4,7 +4,6 @@
 from pydantic_settings import BaseSettings
 from typing import List, Optional
 from functools import lru_cache
-import logging
 
 class Settings(BaseSettings):
     # Базовые настройки
@@ -30,6 +29,10 @@ class Settings(BaseSettings):
     # NLP
     USE_TRANSFORMERS: bool = True
     FALLBACK_TO_TEXTBLOB: bool = True
+    QUANTIZE_MODELS: bool = True  # int8-квантование моделей на CPU
+    TORCH_NUM_THREADS: int = 1  # потоков torch на один воркер
+    COMPILE_MODELS: bool = True  # torch.compile моделей на GPU
+    INFERENCE_BATCH_SIZE: int = 32  # текстов в одном прогоне модели
     SENTIMENT_THRESHOLD_POSITIVE: float = 0.6
     SENTIMENT_THRESHOLD_NEGATIVE: float = 0.4
     RUSSIAN_MODEL_PATH: str = "DeepPavlov/rubert-base-cased-sentiment"
@@ -49,9 +52,3 @@ def get_settings():
     return Settings()
 
 settings = get_settings()
-
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO if not settings.DEBUG else logging.DEBUG,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
\ No newline at end of file
@@ -1,19 +1,26 @@
 # app/database.py
-import os
 from typing import AsyncGenerator
 
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.config import settings
 
-# DATABASE_URL берём из окружения, если не задан — fallback на sqlite для локальной разработки
-DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./dev.db")
+# DATABASE_URL берём из настроек (.env / окружение)
+DATABASE_URL = settings.DATABASE_URL
 
-# Асинхронный движок
+# Асинхронный движок с общим пулом соединений на процесс
 engine = create_async_engine(
     DATABASE_URL,  # Должно быть: postgresql+asyncpg://...
-    pool_size=10,
-    max_overflow=20,
+    pool_size=settings.DATABASE_POOL_SIZE,
+    max_overflow=settings.DATABASE_MAX_OVERFLOW,
+    pool_pre_ping=False,
+    pool_recycle=1800,
+    connect_args={
+        "server_settings": {"jit": "off"},
+        # Кэш подготовленных выражений диалекта SQLAlchemy на соединение
+        # (statement_cache_size самого asyncpg на этом пути не используется)
+        "prepared_statement_cache_size": 1024,
+    },
     echo=settings.DEBUG
 )
 
@@ -34,14 +41,3 @@ async def get_session() -> AsyncGenerator[AsyncSession, None]:
 __all__ = ["engine", "SessionLocal", "get_session"]
 
 Base = declarative_base()
-
-async def get_db():
-    async with SessionLocal() as session:
-        try:
-            yield session
-            await session.commit()
-        except:
-            await session.rollback()
-            raise
-        finally:
-            await session.close()
\ No newline at end of file
@@ -1,26 +1,32 @@
 """
 Основное приложение FastAPI
 """
-from fastapi import FastAPI, Request
+from fastapi import Depends, FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from slowapi import Limiter, _rate_limit_exceeded_handler
+from fastapi.responses import ORJSONResponse
 from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
 from contextlib import asynccontextmanager
+import asyncio
 from datetime import datetime
+from functools import lru_cache
+import time
+from sqlalchemy import text
 import structlog
 from app.config import settings
+from app.utils.logging import configure_logging
+from app.utils.rate_limit import LocalSyncedStorage, make_checker
 
+from app.database import engine
 from app.models.base import Base
+from app.services.analysis import get_analyzer
 from app.api.endpoints import reviews, tasks, analytics
 
 # Настройка структурированного логирования
-import logging
-logger = logging.getLogger(__name__)
+configure_logging()
 logger = structlog.get_logger()
 
-# Rate limiter
-limiter = Limiter(key_func=get_remote_address)
+# Хранилище rate limiting: счётчики в памяти процесса, синхронизация через Redis
+rate_limit_storage = LocalSyncedStorage(redis_url=settings.REDIS_URL)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -28,9 +34,21 @@ async def lifespan(app: FastAPI):
     # Инициализация при старте
     logger.info("starting_application", version=settings.PROJECT_VERSION)
     
-    # Создание таблиц (в продакшене используйте Alembic миграции)
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # Создание таблиц только в режиме отладки, в продакшене схемой управляет Alembic
+    if settings.DEBUG:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    
+    # Прогрев пула: первое соединение и handshake asyncpg до приёма трафика
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    
+    # Загрузка моделей в отдельном потоке, чтобы не блокировать event loop
+    app.state.review_analyzer = await asyncio.to_thread(get_analyzer)
+    logger.info("models_loaded")
+    
+    # Построение OpenAPI-схемы до первого запроса
+    app.openapi()
     
     yield
     
@@ -44,15 +62,12 @@ app = FastAPI(
     version=settings.PROJECT_VERSION,
     description="Интеллектуальная система анализа отзывов с поддержкой русского языка",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json"
 )
 
-# Настройка rate limiting
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -62,11 +77,37 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Лимит для отзывов: проверка собрана заранее и выставляет заголовки
+# X-RateLimit-*. Роутер reviews пока не содержит маршрутов, поэтому
+# ограничение начнёт действовать только вместе с эндпоинтами отзывов;
+# остальные маршруты приложения сейчас не ограничены
+reviews_rate_limit = make_checker(
+    rate_limit_storage,
+    limit=settings.API_RATE_LIMIT,
+    window=60,
+    key_fn=get_remote_address,
+    scope="reviews",
+)
+
 # Подключение роутеров
-app.include_router(reviews.router, prefix="/api/v1/reviews", tags=["Reviews"])
+app.include_router(
+    reviews.router,
+    prefix="/api/v1/reviews",
+    tags=["Reviews"],
+    dependencies=[Depends(reviews_rate_limit)]
+)
 app.include_router(tasks.router, prefix="/api/v1/tasks", tags=["Batch Processing"])
 app.include_router(analytics.router, prefix="/api/v1/analytics", tags=["Analytics"])
 
+@lru_cache(maxsize=1)
+def _iso_second(second: int) -> str:
+    """ISO-строка времени с точностью до секунды (кэш на текущую секунду)"""
+    return datetime.utcfromtimestamp(second).isoformat()
+
+def _iso_now() -> str:
+    """Текущее время UTC в ISO-формате, пересчитывается раз в секунду"""
+    return _iso_second(int(time.time()))
+
 @app.get("/health")
 async def health_check():
     """Эндпоинт проверки работоспособности системы"""
@@ -74,7 +115,7 @@ async def health_check():
         "status": "healthy",
         "service": settings.PROJECT_NAME,
         "version": settings.PROJECT_VERSION,
-        "timestamp": datetime.utcnow().isoformat()
+        "timestamp": _iso_now()
     }
 
 @app.get("/")
@@ -87,6 +128,38 @@ async def root():
         "health": "/health"
     }
 
+@app.get("/api/v1/docs")
+async def custom_openapi():
+    """Кастомная документация с примерами"""
+    # app.openapi() строит схему один раз и сохраняет её в app.openapi_schema
+    if app.openapi_schema is None:
+        app.openapi()
+    return ORJSONResponse(app.openapi_schema)
+
+@app.exception_handler(HTTPException)
+async def http_exception_handler(request: Request, exc: HTTPException):
+    """Обработчик ошибок HTTP"""
+    log = logger.bind(path=request.url.path)
+    # Отказы rate limiting ожидаемы и при всплеске запросов массовы
+    if exc.status_code == 429:
+        log.info("rate_limited", detail=exc.detail)
+    else:
+        log.error("HTTP exception", status_code=exc.status_code, detail=exc.detail)
+    return ORJSONResponse(
+        status_code=exc.status_code,
+        content={"detail": exc.detail, "status": "error"},
+        headers=exc.headers
+    )
+
+@app.exception_handler(Exception)
+async def general_exception_handler(request: Request, exc: Exception):
+    """Обработчик общих ошибок"""
+    logger.bind(path=request.url.path).error("Unexpected error", error=str(exc))
+    return ORJSONResponse(
+        status_code=500,
+        content={"detail": "Internal server error", "status": "error"}
+    )
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -94,5 +167,7 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=settings.DEBUG,
-        log_level="info"
+        log_level="info",
+        loop="uvloop",
+        http="httptools"
     )
\ No newline at end of file
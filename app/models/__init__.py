@@ -1,5 +1,4 @@
-from sqlalchemy.orm import declarative_base
+from app.models.base import Base, BaseModel
+from app.models.review import Review, AnalysisResult
 
-Base = declarative_base()
-
-__all__ = ["Base"]
\ No newline at end of file
+__all__ = ["Base", "BaseModel", "Review", "AnalysisResult"]
@@ -2,7 +2,8 @@
 Базовый класс для всех моделей SQLAlchemy
 """
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, Integer, DateTime, Boolean, func
+from sqlalchemy import Column, Integer, DateTime, Boolean, event, false, func
+from sqlalchemy.orm import Session, with_loader_criteria
 from datetime import datetime
 
 Base = declarative_base()
@@ -14,10 +15,32 @@ class BaseModel(Base):
     id = Column(Integer, primary_key=True, index=True)
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
-    is_deleted = Column(Boolean, default=False)
+    is_deleted = Column(Boolean, default=False, server_default=false(), nullable=False)
     deleted_at = Column(DateTime, nullable=True)
     
     def soft_delete(self):
         """Мягкое удаление записи"""
         self.is_deleted = True
-        self.deleted_at = datetime.utcnow()
\ No newline at end of file
+        self.deleted_at = datetime.utcnow()
+
+@event.listens_for(Session, "do_orm_execute")
+def _exclude_deleted(execute_state):
+    """
+    Фильтр is_deleted = false для всех SELECT по моделям с мягким удалением
+    
+    Отключается опцией выполнения include_deleted=True:
+    select(Review).execution_options(include_deleted=True)
+    """
+    if (
+        execute_state.is_select
+        and not execute_state.is_column_load
+        and not execute_state.is_relationship_load
+        and not execute_state.execution_options.get("include_deleted", False)
+    ):
+        execute_state.statement = execute_state.statement.options(
+            with_loader_criteria(
+                BaseModel,
+                lambda cls: cls.is_deleted == false(),
+                include_aliases=True
+            )
+        )
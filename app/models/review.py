@@ -1,7 +1,7 @@
 """
 Модель отзыва и результатов анализа
 """
-from sqlalchemy import Column, String, Text, Float, JSON, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Text, Float, JSON, ForeignKey, DateTime, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.models.base import BaseModel
@@ -10,6 +10,10 @@ import uuid
 class Review(BaseModel):
     """Модель отзыва"""
     __tablename__ = "reviews"
+    __table_args__ = (
+        # Частичный индекс по активным (не удалённым) отзывам
+        Index("ix_reviews_active", "id", postgresql_where=text("is_deleted = false")),
+    )
     
     uuid = Column(String(36), unique=True, default=lambda: str(uuid.uuid4()), index=True)
     text = Column(Text, nullable=False)
@@ -31,6 +35,13 @@ class Review(BaseModel):
 class AnalysisResult(BaseModel):
     """Модель результатов анализа"""
     __tablename__ = "analysis_results"
+    __table_args__ = (
+        Index(
+            "ix_analysis_results_active",
+            "review_id",
+            postgresql_where=text("is_deleted = false")
+        ),
+    )
     
     review_id = Column(Integer, ForeignKey("reviews.id", ondelete="CASCADE"), nullable=False)
     sentiment = Column(String(20), nullable=False)  # positive/negative/neutral
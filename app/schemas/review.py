@@ -6,6 +6,9 @@ from typing import Optional, Dict, List
 from datetime import datetime
 import re
 
+# HTML теги и потенциально опасные символы - один проход по строке
+_SANITIZE_RE = re.compile(r'<[^>]*>|[<>{}\[\]()]')
+
 class ReviewBase(BaseModel):
     """Базовая схема отзыва"""
     text: str = Field(..., min_length=1, max_length=10000)
@@ -14,11 +17,7 @@ class ReviewBase(BaseModel):
     @validator('text')
     def sanitize_text(cls, v):
         """Очистка текста от потенциальных угроз"""
-        # Удаление HTML тегов
-        v = re.sub(r'<[^>]*>', '', v)
-        # Удаление потенциально опасных символов
-        v = re.sub(r'[<>{}[\]()]', '', v)
-        return v.strip()
+        return _SANITIZE_RE.sub('', v).strip()
 
 class ReviewCreate(ReviewBase):
     """Схема для создания отзыва"""
@@ -1,12 +1,18 @@
 """
 Основной сервис анализа отзывов
 """
-from typing import Dict, Any
+from collections import defaultdict
+from functools import lru_cache
+from typing import Callable, Dict, Any, List, Optional, Tuple
 import logging
+import torch
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import insert, select
+from sqlalchemy.orm import noload
+from sqlalchemy.exc import SQLAlchemyError
 
 from app.models import Review, AnalysisResult
+from app.services.cache import AnalysisCache
 from app.services.nlp.sentiment import SentimentAnalyzer
 from app.services.nlp.aspects import AspectExtractor
 from app.services.nlp.phrases import KeyPhraseExtractor
@@ -20,10 +26,13 @@ class ReviewAnalyzer:
     def __init__(self):
         self.sentiment_analyzer = SentimentAnalyzer(
             use_transformers=settings.USE_TRANSFORMERS,
-            fallback=settings.FALLBACK_TO_TEXTBLOB
+            fallback=settings.FALLBACK_TO_TEXTBLOB,
+            quantize=settings.QUANTIZE_MODELS,
+            compile_models=settings.COMPILE_MODELS
         )
         self.aspect_extractor = AspectExtractor()
         self.phrase_extractor = KeyPhraseExtractor()
+        self.cache = AnalysisCache()
     
     async def analyze_and_save(self, review_id: int, db: AsyncSession):
         """
@@ -43,65 +52,294 @@ class ReviewAnalyzer:
                 logger.error(f"Review {review_id} not found")
                 return
             
+            sentiments, aspect_sentiments = await self._analyze_cached([review])
+            analysis_result = AnalysisResult(
+                **self._build_analysis(
+                    review, sentiments[review.id], aspect_sentiments[review.id]
+                )
+            )
+            
+            db.add(analysis_result)
+            await db.commit()
+            
+            logger.info(f"Analysis completed for review {review_id}")
+            
+        except Exception as e:
+            logger.error(f"Analysis failed for review {review_id}: {e}")
+            await db.rollback()
+    
+    def _build_analysis(
+        self,
+        review: Review,
+        sentiment_result: Optional[Dict[str, Any]] = None,
+        aspect_sentiments: Optional[Dict[str, Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """
+        Анализ загруженного отзыва без обращения к базе
+        
+        Args:
+            review: Отзыв из базы данных
+            sentiment_result: Готовый результат анализа тональности
+                (язык отзыва в этом случае уже определён)
+            aspect_sentiments: Готовая тональность аспектов отзыва
+            
+        Returns:
+            Значения полей записи AnalysisResult
+        """
+        if sentiment_result is None:
             # Определение языка
-            language = self._detect_language(review.text)
-            review.language = language
+            review.language = self._detect_language(review.text)
             
             # Анализ тональности
-            sentiment_result = self.sentiment_analyzer.analyze(review.text, language)
-            
-            # Анализ аспектов
+            sentiment_result = self.sentiment_analyzer.analyze(review.text, review.language)
+        language = review.language
+        
+        # Анализ аспектов и их тональности (один прогон модели на все аспекты)
+        if aspect_sentiments is None:
             aspects = self.aspect_extractor.extract_aspects(review.text, language)
+            aspect_sentiments = self.aspect_extractor.classify_aspect_sentiments(
+                aspects, self.sentiment_analyzer, language
+            )
+        
+        # Извлечение ключевых фраз
+        key_phrases = self.phrase_extractor.extract_key_phrases(
+            review.text, sentiment_result['sentiment']
+        )
+        
+        return {
+            'review_id': review.id,
+            'sentiment': sentiment_result['sentiment'],
+            'confidence': sentiment_result['confidence'],
+            'aspects': aspect_sentiments,
+            'key_phrases': key_phrases,
+            'emotion_intensity': sentiment_result.get('emotion_intensity', {})
+        }
+    
+    async def analyze_many(
+        self, reviews: List[Review], errors: Optional[Dict[int, str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Анализ нескольких загруженных отзывов без обращения к базе
+        
+        Args:
+            reviews: Отзывы из базы данных
+            errors: Словарь для причин ошибок {ID отзыва: repr исключения};
+                если не передан, ошибки логируются по отдельности
             
-            # Анализ тональности по аспектам
-            aspect_sentiments = {}
-            for aspect, sentences in aspects.items():
-                combined_text = " ".join(sentences)
-                aspect_sentiment = self.aspect_extractor.classify_aspect_sentiment(
-                    combined_text, self.sentiment_analyzer
+        Returns:
+            Значения полей AnalysisResult для успешно проанализированных отзывов
+        """
+        try:
+            sentiments, aspect_sentiments = await self._analyze_cached(reviews)
+        except Exception as e:
+            logger.error(f"Batch sentiment analysis failed: {e}")
+            sentiments, aspect_sentiments = {}, {}
+        
+        rows = []
+        for review in reviews:
+            try:
+                rows.append(
+                    self._build_analysis(
+                        review, sentiments.get(review.id), aspect_sentiments.get(review.id)
+                    )
                 )
-                aspect_sentiments[aspect] = aspect_sentiment
+            except Exception as e:
+                if errors is None:
+                    logger.error(f"Analysis failed for review {review.id}: {e}")
+                else:
+                    errors[review.id] = repr(e)
+        return rows
+    
+    async def _analyze_cached(
+        self, reviews: List[Review]
+    ) -> Tuple[Dict[int, Dict[str, Any]], Dict[int, Dict[str, Dict[str, Any]]]]:
+        """
+        Тональность отзывов и их аспектов с использованием кэша Redis
+        
+        Args:
+            reviews: Отзывы из базы данных
             
-            # Извлечение ключевых фраз
-            key_phrases = self.phrase_extractor.extract_key_phrases(
-                review.text, sentiment_result['sentiment']
+        Returns:
+            Словари {ID отзыва: результат} для тональности и для аспектов
+        """
+        for review in reviews:
+            review.language = self._detect_language(review.text)
+        
+        # Результаты резервного словаря вместо отказавшей модели не кэшируются
+        sentiments = await self._cached(
+            "sent", reviews, self._analyze_sentiments,
+            cacheable=lambda result: not result.get('degraded')
+        )
+        aspect_sentiments = await self._cached(
+            "asp", reviews, self._classify_aspects,
+            cacheable=lambda result: not any(
+                aspect.get('degraded') for aspect in result.values()
             )
+        )
+        return sentiments, aspect_sentiments
+    
+    async def _cached(
+        self,
+        prefix: str,
+        reviews: List[Review],
+        compute: Callable[[List[Review]], Dict[int, Any]],
+        cacheable: Optional[Callable[[Any], bool]] = None
+    ) -> Dict[int, Any]:
+        """
+        Получение результатов из кэша и вычисление только промахов
+        
+        Ключ включает способ анализа языка отзыва, поэтому результаты
+        словаря и моделей transformers не подменяют друг друга.
+        
+        Args:
+            prefix: Префикс ключей кэша
+            reviews: Отзывы с определённым языком
+            compute: Пакетное вычисление результатов для промахов
+            cacheable: Проверка, можно ли сохранить результат в кэш
             
-            # Создание записи с результатами анализа
-            analysis_result = AnalysisResult(
-                review_id=review_id,
-                sentiment=sentiment_result['sentiment'],
-                confidence=sentiment_result['confidence'],
-                aspects=aspect_sentiments,
-                key_phrases=key_phrases,
-                emotion_intensity=sentiment_result.get('emotion_intensity', {})
+        Returns:
+            Словарь {ID отзыва: результат}
+        """
+        keys = [
+            self.cache.make_key(
+                f"{prefix}:{self.sentiment_analyzer.mode(review.language)}",
+                review.text, review.language
             )
+            for review in reviews
+        ]
+        cached = await self.cache.get_many(keys)
+        
+        results = {}
+        misses = []
+        for review, key, value in zip(reviews, keys, cached):
+            if value is None:
+                misses.append((review, key))
+            else:
+                results[review.id] = value
+        
+        if misses:
+            computed = compute([review for review, _ in misses])
+            results.update(computed)
+            await self.cache.set_many({
+                key: computed[review.id]
+                for review, key in misses
+                if review.id in computed
+                and (cacheable is None or cacheable(computed[review.id]))
+            })
+        
+        return results
+    
+    def _analyze_sentiments(self, reviews: List[Review]) -> Dict[int, Dict[str, Any]]:
+        """
+        Пакетный анализ тональности с группировкой отзывов по языку
+        
+        Args:
+            reviews: Отзывы с определённым языком
             
-            db.add(analysis_result)
-            await db.commit()
-            
-            logger.info(f"Analysis completed for review {review_id}")
+        Returns:
+            Словарь {ID отзыва: результат анализа тональности}
+        """
+        by_language = defaultdict(list)
+        for review in reviews:
+            by_language[review.language].append(review)
+        
+        sentiments = {}
+        for language, group in by_language.items():
+            results = self.sentiment_analyzer.analyze_many(
+                [review.text for review in group], language,
+                batch_size=settings.INFERENCE_BATCH_SIZE
+            )
+            sentiments.update(zip((review.id for review in group), results))
+        return sentiments
+    
+    def _classify_aspects(self, reviews: List[Review]) -> Dict[int, Dict[str, Dict[str, Any]]]:
+        """
+        Извлечение аспектов нескольких отзывов и классификация их тональности
+        
+        Args:
+            reviews: Отзывы с определённым языком
             
-        except Exception as e:
-            logger.error(f"Analysis failed for review {review_id}: {e}")
-            await db.rollback()
+        Returns:
+            Словарь {ID отзыва: {аспект: {sentiment, confidence}}}
+        """
+        by_language = defaultdict(list)
+        for review in reviews:
+            by_language[review.language].append(review)
+        
+        aspects = {}
+        for language, group in by_language.items():
+            results = self.aspect_extractor.extract_aspects_batch(
+                [review.text for review in group], language
+            )
+            for review, review_aspects in zip(group, results):
+                aspects[review.id] = self.aspect_extractor.classify_aspect_sentiments(
+                    review_aspects, self.sentiment_analyzer, language
+                )
+        return aspects
     
     def _detect_language(self, text: str) -> str:
         """Определение языка текста"""
         # Используем встроенный метод анализатора тональности
         return self.sentiment_analyzer._detect_language(text)
     
-    async def analyze_batch(self, review_ids: list, db: AsyncSession):
+    async def analyze_batch(
+        self, review_ids: list, db: AsyncSession, chunk_size: int = 100
+    ) -> Dict[str, Any]:
         """
-        Пакетный анализ отзывов
+        Пакетный анализ отзывов: выборка отзывов и ID уже сохранённых
+        результатов, массовая вставка новых результатов и одна фиксация
         
         Args:
             review_ids: Список ID отзывов
             db: Сессия базы данных
+            chunk_size: Размер части, сохраняемой в отдельной точке сохранения
+            
+        Returns:
+            Словарь с числом проанализированных отзывов (включая уже имевшие
+            результат) и списком пар (ID необработанного отзыва, причина)
         """
-        logger.info(f"Starting batch analysis for {len(review_ids)} reviews")
+        # Результаты анализа загружаются ниже только как ID
+        query = (
+            select(Review)
+            .where(Review.id.in_(review_ids))
+            .options(noload(Review.analysis))
+        )
+        result = await db.execute(query)
         
-        for review_id in review_ids:
-            await self.analyze_and_save(review_id, db)
+        # При повторной доставке сообщения (acks_late) часть отзывов уже
+        # проанализирована: они не анализируются и не вставляются повторно
+        analyzed = await db.execute(
+            select(AnalysisResult.review_id).where(AnalysisResult.review_id.in_(review_ids))
+        )
+        saved_ids = set(analyzed.scalars())
+        reviews = [review for review in result.scalars() if review.id not in saved_ids]
         
-        logger.info(f"Batch analysis completed for {len(review_ids)} reviews")
\ No newline at end of file
+        errors: Dict[int, str] = {}
+        for start in range(0, len(reviews), chunk_size):
+            rows = await self.analyze_many(reviews[start:start + chunk_size], errors)
+            if not rows:
+                continue
+            
+            # Ошибка записи откатывает только текущую часть
+            try:
+                async with db.begin_nested():
+                    await db.execute(insert(AnalysisResult), rows)
+                saved_ids.update(row['review_id'] for row in rows)
+            except SQLAlchemyError as e:
+                errors.update((row['review_id'], repr(e)) for row in rows)
+        
+        await db.commit()
+        
+        failed_ids = [
+            (review_id, errors.get(review_id, 'not found'))
+            for review_id in review_ids if review_id not in saved_ids
+        ]
+        return {'processed': len(saved_ids), 'failed_ids': failed_ids}
+
+@lru_cache()
+def get_analyzer() -> ReviewAnalyzer:
+    """Общий для процесса экземпляр анализатора с загруженными моделями"""
+    torch.set_num_threads(settings.TORCH_NUM_THREADS)
+    analyzer = ReviewAnalyzer()
+    analyzer.sentiment_analyzer.warmup()
+    return analyzer
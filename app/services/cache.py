@@ -0,0 +1,70 @@
+"""
+Кэш результатов NLP-анализа в Redis
+"""
+from hashlib import blake2b
+from typing import Any, Dict, List, Optional
+import logging
+
+import orjson
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+class AnalysisCache:
+    """
+    Кэш результатов анализа по хэшу текста и языку
+
+    Недоступность Redis не прерывает анализ: чтение возвращает промахи,
+    ошибки записи только логируются.
+    """
+
+    def __init__(
+        self,
+        redis_url: str = settings.REDIS_URL,
+        ttl: int = settings.REDIS_CACHE_TTL,
+        socket_timeout: float = 0.5
+    ):
+        self.ttl = ttl
+        # Зависший Redis не должен задерживать пакет дольше socket_timeout
+        self._redis = aioredis.from_url(
+            redis_url,
+            socket_timeout=socket_timeout,
+            socket_connect_timeout=socket_timeout
+        )
+
+    @staticmethod
+    def make_key(prefix: str, text: str, language: str) -> str:
+        """Ключ вида '<prefix>:<хэш текста>:<язык>', префикс может включать способ анализа"""
+        digest = blake2b(text.encode(), digest_size=16).hexdigest()
+        return f"{prefix}:{digest}:{language}"
+
+    async def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        Получение значений одним MGET
+
+        Returns:
+            Значения в порядке ключей, None для промахов
+        """
+        if not keys:
+            return []
+        try:
+            values = await self._redis.mget(keys)
+        except RedisError as e:
+            logger.warning(f"Analysis cache read failed: {e}")
+            return [None] * len(keys)
+        return [orjson.loads(value) if value is not None else None for value in values]
+
+    async def set_many(self, items: Dict[str, Any]):
+        """Запись значений с TTL одним конвейером"""
+        if not items:
+            return
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for key, value in items.items():
+                    pipe.setex(key, self.ttl, orjson.dumps(value))
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Analysis cache write failed: {e}")
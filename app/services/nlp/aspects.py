@@ -3,61 +3,72 @@
 """
 from typing import Dict, List, Tuple
 import spacy
-from spacy.matcher import Matcher
+from spacy.matcher import PhraseMatcher
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Компоненты пайплайна, не нужные для поиска аспектов:
+# используются только токенизатор и границы предложений
+UNUSED_PIPES = [
+    "tok2vec", "tagger", "morphologizer", "parser", "senter",
+    "attribute_ruler", "lemmatizer", "ner",
+]
+
 class AspectExtractor:
     """Извлечение аспектов из текста"""
     
     def __init__(self):
         # Загрузка моделей spaCy для русского и английского
         try:
-            self.nlp_ru = spacy.load("ru_core_news_sm")
-            self.nlp_en = spacy.load("en_core_web_sm")
+            self.nlp_ru = spacy.load("ru_core_news_sm", exclude=UNUSED_PIPES)
+            self.nlp_en = spacy.load("en_core_web_sm", exclude=UNUSED_PIPES)
             logger.info("spaCy models loaded successfully")
         except OSError:
             logger.error("spaCy models not found. Please install: "
                        "python -m spacy download ru_core_news_sm en_core_web_sm")
             raise
         
-        # Паттерны для извлечения аспектов
-        self.aspect_patterns = {
+        # Границы предложений по пунктуации вместо синтаксического парсера
+        self.nlp_ru.add_pipe("sentencizer")
+        self.nlp_en.add_pipe("sentencizer")
+        
+        # Термины для извлечения аспектов
+        self.aspect_terms = {
             'ru': [
                 # Качество продукта
-                [{'LOWER': {'IN': ['качество', 'продукт', 'товар']}}],
+                ['качество', 'продукт', 'товар'],
                 # Сервис
-                [{'LOWER': {'IN': ['сервис', 'обслуживание', 'помощь']}}],
+                ['сервис', 'обслуживание', 'помощь'],
                 # Цена
-                [{'LOWER': {'IN': ['цена', 'стоимость', 'дорого', 'дешево']}}],
+                ['цена', 'стоимость', 'дорого', 'дешево'],
                 # Доставка
-                [{'LOWER': {'IN': ['доставка', 'отправка', 'прибытие']}}],
+                ['доставка', 'отправка', 'прибытие'],
                 # Упаковка
-                [{'LOWER': {'IN': ['упаковка', 'пакет', 'коробка']}}],
+                ['упаковка', 'пакет', 'коробка'],
             ],
             'en': [
                 # Product quality
-                [{'LOWER': {'IN': ['quality', 'product', 'item']}}],
+                ['quality', 'product', 'item'],
                 # Service
-                [{'LOWER': {'IN': ['service', 'support', 'help']}}],
+                ['service', 'support', 'help'],
                 # Price
-                [{'LOWER': {'IN': ['price', 'cost', 'expensive', 'cheap']}}],
+                ['price', 'cost', 'expensive', 'cheap'],
                 # Delivery
-                [{'LOWER': {'IN': ['delivery', 'shipping', 'arrival']}}],
+                ['delivery', 'shipping', 'arrival'],
                 # Packaging
-                [{'LOWER': {'IN': ['packaging', 'package', 'box']}}],
+                ['packaging', 'package', 'box'],
             ]
         }
         
-        # Инициализация матчера
+        # Инициализация матчера (поиск по словарю за один проход по тексту)
         self.matchers = {}
         for lang in ['ru', 'en']:
             nlp = self.nlp_ru if lang == 'ru' else self.nlp_en
-            matcher = Matcher(nlp.vocab)
+            matcher = PhraseMatcher(nlp.vocab, attr="LOWER")
             
-            for i, pattern in enumerate(self.aspect_patterns[lang]):
-                matcher.add(f"ASPECT_{i}", [pattern])
+            for i, terms in enumerate(self.aspect_terms[lang]):
+                matcher.add(f"ASPECT_{i}", [nlp.make_doc(term) for term in terms])
             
             self.matchers[lang] = matcher
     
@@ -77,23 +88,9 @@ class AspectExtractor:
         try:
             # Выбор модели в зависимости от языка
             nlp = self.nlp_ru if language == 'ru' else self.nlp_en
-            matcher = self.matchers[language]
             
             # Обработка текста
-            doc = nlp(text)
-            matches = matcher(doc)
-            
-            # Извлечение аспектов
-            for match_id, start, end in matches:
-                aspect = doc[start:end].text.lower()
-                span = doc[start:end]
-                
-                # Получение контекста (предложение)
-                sentence = span.sent.text
-                
-                if aspect not in aspects:
-                    aspects[aspect] = []
-                aspects[aspect].append(sentence)
+            aspects = self._collect_aspects(nlp(text), language)
             
             logger.info(f"Extracted {len(aspects)} aspects from text")
             
@@ -102,26 +99,80 @@ class AspectExtractor:
         
         return aspects
     
-    def classify_aspect_sentiment(self, aspect_text: str, sentiment_analyzer) -> Dict:
+    def extract_aspects_batch(self, texts: List[str], language: str = 'ru') -> List[Dict[str, List[str]]]:
+        """
+        Извлечение аспектов из нескольких текстов одного языка
+        
+        Args:
+            texts: Тексты для анализа
+            language: Язык текстов (ru/en)
+            
+        Returns:
+            Список словарей с аспектами в порядке исходных текстов
+        """
+        try:
+            nlp = self.nlp_ru if language == 'ru' else self.nlp_en
+            return [
+                self._collect_aspects(doc, language)
+                for doc in nlp.pipe(texts, batch_size=64, n_process=1)
+            ]
+        except Exception as e:
+            logger.error(f"Batch aspect extraction failed: {e}")
+            return [self.extract_aspects(text, language) for text in texts]
+    
+    def _collect_aspects(self, doc, language: str) -> Dict[str, List[str]]:
+        """Сбор найденных аспектов и их предложений из обработанного документа"""
+        aspects = {}
+        matcher = self.matchers[language]
+        
+        # Извлечение аспектов
+        for match_id, start, end in matcher(doc):
+            span = doc[start:end]
+            aspect = span.text.lower()
+            
+            # Получение контекста (предложение)
+            sentence = span.sent.text
+            
+            if aspect not in aspects:
+                aspects[aspect] = []
+            aspects[aspect].append(sentence)
+        
+        return aspects
+    
+    def classify_aspect_sentiments(
+        self, aspects: Dict[str, List[str]], sentiment_analyzer, language: str
+    ) -> Dict[str, Dict]:
         """
-        Классификация тональности для каждого аспекта
+        Классификация тональности всех аспектов отзыва одним пакетом
         
         Args:
-            aspect_text: Текст, связанный с аспектом
+            aspects: Аспекты и связанные с ними предложения
             sentiment_analyzer: Экземпляр анализатора тональности
+            language: Язык текста (ru/en)
             
         Returns:
-            Словарь с тональностью и уверенностью
+            Словарь {аспект: {sentiment, confidence}}; оценки резервного
+            метода после отказа модели помечены 'degraded': True
         """
+        if not aspects:
+            return {}
+        
+        texts = [" ".join(sentences) for sentences in aspects.values()]
         try:
-            result = sentiment_analyzer.analyze(aspect_text)
+            results = sentiment_analyzer.analyze_many(texts, language)
+        except Exception as e:
+            logger.error(f"Aspect sentiment classification failed: {e}")
             return {
+                aspect: {'sentiment': 'neutral', 'confidence': 0.5, 'degraded': True}
+                for aspect in aspects
+            }
+        
+        classified = {}
+        for aspect, result in zip(aspects.keys(), results):
+            classified[aspect] = {
                 'sentiment': result['sentiment'],
                 'confidence': result['confidence']
             }
-        except Exception as e:
-            logger.error(f"Aspect sentiment classification failed: {e}")
-            return {
-                'sentiment': 'neutral',
-                'confidence': 0.5
-            }
\ No newline at end of file
+            if result.get('degraded'):
+                classified[aspect]['degraded'] = True
+        return classified
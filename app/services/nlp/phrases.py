@@ -0,0 +1,58 @@
+"""
+Извлечение ключевых фраз по словарю тональности
+"""
+from typing import Dict, List
+import re
+import logging
+
+from app.services.nlp.sentiment import SentimentAnalyzer
+
+logger = logging.getLogger(__name__)
+
+# Границы фраз: знаки препинания и противительные союзы
+_FRAGMENT_RE = re.compile(r"[.!?;,\n]+|\s+(?:но|а|однако|зато|but|however|though)\s+", re.IGNORECASE)
+
+class KeyPhraseExtractor:
+    """Извлечение положительных и отрицательных фраз из отзыва"""
+
+    def __init__(self, max_phrases: int = 5, max_length: int = 100):
+        self.max_phrases = max_phrases
+        self.max_length = max_length
+
+    def extract_key_phrases(self, text: str, sentiment: str) -> Dict[str, List[str]]:
+        """
+        Извлечение ключевых фраз
+
+        Текст делится на фрагменты по пунктуации и противительным союзам,
+        полярность каждого фрагмента считается по словарю тональности.
+        Если оценочных слов нет, весь короткий отзыв относится к его общей
+        тональности.
+
+        Args:
+            text: Текст отзыва
+            sentiment: Общая тональность отзыва (positive/negative/neutral)
+
+        Returns:
+            Словарь {'positive': [...], 'negative': [...]}, фразы упорядочены
+            по убыванию силы оценки
+        """
+        scored = []
+        for fragment in _FRAGMENT_RE.split(text):
+            fragment = fragment.strip()
+            if not fragment or len(fragment) > self.max_length:
+                continue
+            polarity = SentimentAnalyzer._lexicon_polarity(fragment)
+            if polarity:
+                scored.append((abs(polarity), polarity > 0, fragment))
+
+        phrases = {'positive': [], 'negative': []}
+        for _, is_positive, fragment in sorted(scored, key=lambda item: -item[0]):
+            group = phrases['positive' if is_positive else 'negative']
+            if len(group) < self.max_phrases and fragment not in group:
+                group.append(fragment)
+
+        stripped = text.strip()
+        if not scored and sentiment in phrases and stripped and len(stripped) <= self.max_length:
+            phrases[sentiment].append(stripped)
+
+        return phrases
@@ -1,21 +1,71 @@
 """
 Анализ тональности с поддержкой русского и английского языков
 """
-from typing import Dict, Tuple, Optional
+from contextlib import contextmanager
+from typing import Dict, List, Tuple, Optional
 import logging
+import re
+import ahocorasick
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 import torch
-from textblob import TextBlob
-from langdetect import detect
+
+from app.utils.language_detection import detect_language
 
 logger = logging.getLogger(__name__)
 
+# Словарь тональности для резервного анализа (ru/en)
+POS_WORDS = frozenset([
+    'хорошо', 'хороший', 'хорошая', 'хорошее', 'хорошие', 'отлично', 'отличный',
+    'отличная', 'отличное', 'прекрасно', 'прекрасный', 'замечательно', 'замечательный',
+    'супер', 'класс', 'нравится', 'понравилось', 'понравился', 'доволен', 'довольна',
+    'довольны', 'рекомендую', 'спасибо', 'быстро', 'быстрая', 'удобно', 'удобный',
+    'вкусно', 'вкусный', 'качественный', 'рад', 'рада', 'счастлив', 'лучший',
+    'good', 'great', 'excellent', 'amazing', 'awesome', 'perfect', 'love', 'like',
+    'nice', 'happy', 'recommend', 'fast', 'best', 'wonderful', 'satisfied', 'thanks',
+])
+NEG_WORDS = frozenset([
+    'плохо', 'плохой', 'плохая', 'плохое', 'плохие', 'ужасно', 'ужасный', 'ужасная',
+    'отвратительно', 'отвратительный', 'кошмар', 'разочарован', 'разочарована',
+    'разочарование', 'недоволен', 'недовольна', 'долго', 'медленно', 'сломан',
+    'сломано', 'брак', 'грязно', 'грубо', 'грубый', 'дорого', 'невкусно', 'ненавижу',
+    'злой', 'обман', 'худший', 'жаль',
+    'bad', 'terrible', 'awful', 'horrible', 'worst', 'hate', 'poor', 'disappointed',
+    'disappointing', 'slow', 'broken', 'rude', 'angry', 'expensive', 'dirty', 'waste',
+])
+NEGATIONS = frozenset(['не', 'нет', 'ни', 'not', 'no', 'never'])
+
+_WORD_RE = re.compile(r"\w+(?:'\w+)?")
+
+# Ключевые слова эмоций (поиск подстрок)
+EMOTION_KEYWORDS = {
+    'joy': ['хорошо', 'отлично', 'прекрасно', 'рад', 'счастлив', 'good', 'great', 'excellent', 'happy', 'joy'],
+    'anger': ['плохо', 'ужасно', 'злой', 'разочарован', 'ненавижу', 'bad', 'terrible', 'angry', 'hate', 'disappointed'],
+    'sadness': ['грустно', 'печально', 'разочарование', 'sad', 'disappointed', 'unhappy'],
+    'surprise': ['удивительно', 'неожиданно', 'шокирован', 'surprising', 'unexpected', 'shocked'],
+    'fear': ['беспокоюсь', 'боюсь', 'опасаюсь', 'worry', 'fear', 'concerned']
+}
+
+# Одно слово может относиться к нескольким эмоциям ('disappointed')
+KEYWORD_EMOTIONS: Dict[str, List[str]] = {}
+for _emotion, _keywords in EMOTION_KEYWORDS.items():
+    for _kw in _keywords:
+        KEYWORD_EMOTIONS.setdefault(_kw, []).append(_emotion)
+
+# Автомат Ахо-Корасик: все ключевые слова за один проход по тексту
+EMOTION_AUTOMATON = ahocorasick.Automaton()
+for _kw in KEYWORD_EMOTIONS:
+    EMOTION_AUTOMATON.add_word(_kw, _kw)
+EMOTION_AUTOMATON.make_automaton()
+
 class SentimentAnalyzer:
     """Класс для анализа тональности текста"""
     
-    def __init__(self, use_transformers: bool = True, fallback: bool = True):
+    def __init__(self, use_transformers: bool = True, fallback: bool = True,
+                 quantize: bool = True, compile_models: bool = True):
         self.use_transformers = use_transformers
         self.fallback = fallback
+        self.quantize = quantize
+        self.compile_models = compile_models
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         
         # Загрузка моделей
@@ -28,17 +78,21 @@ class SentimentAnalyzer:
                 self.tokenizers['ru'] = AutoTokenizer.from_pretrained(
                     "DeepPavlov/rubert-base-cased-sentiment"
                 )
-                self.models['ru'] = AutoModelForSequenceClassification.from_pretrained(
-                    "DeepPavlov/rubert-base-cased-sentiment"
-                ).to(self.device)
+                self.models['ru'] = self._prepare_model(
+                    AutoModelForSequenceClassification.from_pretrained(
+                        "DeepPavlov/rubert-base-cased-sentiment"
+                    )
+                )
                 
                 # Английская модель
                 self.tokenizers['en'] = AutoTokenizer.from_pretrained(
                     "cardiffnlp/twitter-roberta-base-sentiment"
                 )
-                self.models['en'] = AutoModelForSequenceClassification.from_pretrained(
-                    "cardiffnlp/twitter-roberta-base-sentiment"
-                ).to(self.device)
+                self.models['en'] = self._prepare_model(
+                    AutoModelForSequenceClassification.from_pretrained(
+                        "cardiffnlp/twitter-roberta-base-sentiment"
+                    )
+                )
                 
                 logger.info("Transformers models loaded successfully")
             except Exception as e:
@@ -47,6 +101,59 @@ class SentimentAnalyzer:
                     raise
                 self.use_transformers = False
     
+    def _prepare_model(self, model):
+        """
+        Подготовка модели к инференсу
+        
+        На GPU веса переводятся в fp16 и граф компилируется torch.compile,
+        на CPU линейные слои динамически квантуются в int8.
+        
+        Пачки дополняются до самого длинного текста, поэтому граф компилируется
+        с динамическими размерами (dynamic=True): иначе каждая новая форма
+        (размер пачки, длина) вызывала бы перекомпиляцию.
+        """
+        model.eval()
+        if self.device.type == "cuda":
+            model = model.half().to(self.device)
+            if self.compile_models:
+                model = torch.compile(model, dynamic=True)
+            return model
+        if self.quantize:
+            model = torch.ao.quantization.quantize_dynamic(
+                model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+        return model.to(self.device)
+    
+    @contextmanager
+    def _inference(self):
+        """Контекст инференса: без autograd, fp16 autocast только на GPU"""
+        with torch.inference_mode(), torch.autocast(
+            device_type=self.device.type,
+            dtype=torch.float16,
+            enabled=self.device.type == "cuda"
+        ):
+            yield
+    
+    def warmup(self):
+        """
+        Прогон пустых входов через каждую модель, чтобы компиляция и ленивая
+        инициализация не приходились на первые запросы
+        
+        torch.compile специализирует размер 1, поэтому прогреваются два графа:
+        одиночный текст и пачка с динамическими размерами.
+        """
+        for language, model in self.models.items():
+            tokenizer = self.tokenizers[language]
+            for texts, length in (([""], 512), (["", ""], 64)):
+                inputs = tokenizer(
+                    texts, padding="max_length", truncation=True,
+                    max_length=length, return_tensors="pt"
+                )
+                inputs = {k: v.to(self.device) for k, v in inputs.items()}
+                with self._inference():
+                    model(**inputs)
+        logger.info("Transformers models warmed up")
+    
     def analyze(self, text: str, language: str = None) -> Dict:
         """
         Анализ тональности текста
@@ -68,14 +175,37 @@ class SentimentAnalyzer:
         else:
             return self._analyze_with_fallback(text, language)
     
+    def mode(self, language: str) -> str:
+        """Способ анализа текстов языка: 'transformers' или 'lexicon'"""
+        if self.use_transformers and language in self.models:
+            return "transformers"
+        return "lexicon"
+    
+    def analyze_many(self, texts: List[str], language: str, batch_size: int = 32) -> List[Dict]:
+        """
+        Пакетный анализ тональности текстов одного языка
+        
+        Args:
+            texts: Тексты для анализа
+            language: Язык текстов (ru/en)
+            batch_size: Количество текстов в одном прогоне модели
+            
+        Returns:
+            Список результатов в порядке исходных текстов
+        """
+        if not (self.use_transformers and language in self.models):
+            return [self._analyze_with_fallback(text, language) for text in texts]
+        
+        results = []
+        for start in range(0, len(texts), batch_size):
+            results.extend(
+                self._analyze_many_with_transformers(texts[start:start + batch_size], language)
+            )
+        return results
+    
     def _detect_language(self, text: str) -> str:
         """Автоопределение языка текста"""
-        try:
-            lang = detect(text)
-            return 'ru' if lang.startswith('ru') else 'en'
-        except:
-            # По умолчанию русский (приоритет)
-            return 'ru'
+        return detect_language(text)
     
     def _analyze_with_transformers(self, text: str, language: str) -> Dict:
         """Анализ с использованием transformers"""
@@ -89,50 +219,81 @@ class SentimentAnalyzer:
             inputs = {k: v.to(self.device) for k, v in inputs.items()}
             
             # Предсказание
-            with torch.no_grad():
+            with self._inference():
                 outputs = model(**inputs)
-                probabilities = torch.nn.functional.softmax(outputs.logits, dim=-1)
+                probabilities = torch.nn.functional.softmax(outputs.logits.float(), dim=-1)
             
             # Получение результатов
             probs = probabilities[0].cpu().numpy()
-            
-            if language == 'ru':
-                # Для русской модели: [negative, neutral, positive]
-                sentiment_scores = {
-                    'negative': float(probs[0]),
-                    'neutral': float(probs[1]),
-                    'positive': float(probs[2])
-                }
-            else:
-                # Для английской модели: [negative, neutral, positive]
-                sentiment_scores = {
-                    'negative': float(probs[0]),
-                    'neutral': float(probs[1]),
-                    'positive': float(probs[2])
-                }
-            
-            # Определение доминирующей тональности
-            dominant_sentiment = max(sentiment_scores, key=sentiment_scores.get)
-            confidence = sentiment_scores[dominant_sentiment]
-            
-            return {
-                'sentiment': dominant_sentiment,
-                'confidence': confidence,
-                'scores': sentiment_scores,
-                'emotion_intensity': self._calculate_emotion_intensity(text, language)
-            }
+            return self._build_result(text, language, probs)
             
         except Exception as e:
             logger.error(f"Transformers analysis failed: {e}")
             if self.fallback:
-                return self._analyze_with_fallback(text, language)
+                return self._degraded_fallback(text, language)
             raise
     
+    def _analyze_many_with_transformers(self, texts: List[str], language: str) -> List[Dict]:
+        """Анализ пачки текстов одним прогоном transformers с динамическим паддингом"""
+        try:
+            tokenizer = self.tokenizers[language]
+            model = self.models[language]
+            
+            # Токенизация с выравниванием по самому длинному тексту пачки
+            inputs = tokenizer(texts, padding=True, truncation=True,
+                             max_length=512, return_tensors="pt")
+            inputs = {k: v.to(self.device) for k, v in inputs.items()}
+            
+            # Предсказание (fp16 autocast только на GPU)
+            with self._inference():
+                outputs = model(**inputs)
+                probabilities = torch.nn.functional.softmax(outputs.logits.float(), dim=-1)
+            
+            probs = probabilities.cpu().numpy()
+            return [self._build_result(text, language, row) for text, row in zip(texts, probs)]
+            
+        except Exception as e:
+            logger.error(f"Batch transformers analysis failed: {e}")
+            if len(texts) == 1:
+                if self.fallback:
+                    return [self._degraded_fallback(texts[0], language)]
+                raise
+            # Повтор по одному тексту: ошибку пачки обычно вызывает один текст,
+            # остальные получают результат модели, а не словаря
+            return [self._analyze_with_transformers(text, language) for text in texts]
+    
+    def _build_result(self, text: str, language: str, probs) -> Dict:
+        """Формирование результата по вероятностям классов модели"""
+        if language == 'ru':
+            # Для русской модели: [negative, neutral, positive]
+            sentiment_scores = {
+                'negative': float(probs[0]),
+                'neutral': float(probs[1]),
+                'positive': float(probs[2])
+            }
+        else:
+            # Для английской модели: [negative, neutral, positive]
+            sentiment_scores = {
+                'negative': float(probs[0]),
+                'neutral': float(probs[1]),
+                'positive': float(probs[2])
+            }
+        
+        # Определение доминирующей тональности
+        dominant_sentiment = max(sentiment_scores, key=sentiment_scores.get)
+        confidence = sentiment_scores[dominant_sentiment]
+        
+        return {
+            'sentiment': dominant_sentiment,
+            'confidence': confidence,
+            'scores': sentiment_scores,
+            'emotion_intensity': self._calculate_emotion_intensity(text, language)
+        }
+    
     def _analyze_with_fallback(self, text: str, language: str) -> Dict:
-        """Резервный анализ с использованием TextBlob"""
+        """Резервный анализ по словарю тональности"""
         try:
-            blob = TextBlob(text)
-            polarity = blob.sentiment.polarity
+            polarity = self._lexicon_polarity(text)
             
             # Определение тональности по полярности
             if polarity > 0.1:
@@ -163,33 +324,65 @@ class SentimentAnalyzer:
                 'sentiment': 'neutral',
                 'confidence': 0.5,
                 'scores': {'negative': 0.3, 'neutral': 0.4, 'positive': 0.3},
-                'emotion_intensity': {}
+                'emotion_intensity': {},
+                'degraded': True
             }
     
+    def _degraded_fallback(self, text: str, language: str) -> Dict:
+        """
+        Результат словаря вместо отказавшей модели
+        
+        Помечается флагом degraded, чтобы не попасть в кэш
+        """
+        result = self._analyze_with_fallback(text, language)
+        result['degraded'] = True
+        return result
+    
+    @staticmethod
+    def _lexicon_polarity(text: str) -> float:
+        """
+        Полярность текста в диапазоне [-1, 1] по словарю тональности
+        
+        Отрицание перед словом меняет его знак; сглаживание в знаменателе
+        не даёт единичному слову сразу дать крайнюю оценку.
+        """
+        positive = negative = 0
+        negated = False
+        for word in _WORD_RE.findall(text.lower()):
+            if word in NEGATIONS:
+                negated = True
+                continue
+            if word in POS_WORDS:
+                if negated:
+                    negative += 1
+                else:
+                    positive += 1
+            elif word in NEG_WORDS:
+                if negated:
+                    positive += 1
+                else:
+                    negative += 1
+            negated = False
+        
+        return (positive - negative) / (positive + negative + 2)
+    
     def _calculate_emotion_intensity(self, text: str, language: str) -> Dict:
         """
         Расчет интенсивности эмоций (упрощенная версия)
         В реальной системе здесь должна быть более сложная модель
         """
-        # Простая эвристика для определения интенсивности эмоций
-        text_lower = text.lower()
-        
-        emotion_keywords = {
-            'joy': ['хорошо', 'отлично', 'прекрасно', 'рад', 'счастлив', 'good', 'great', 'excellent', 'happy', 'joy'],
-            'anger': ['плохо', 'ужасно', 'злой', 'разочарован', 'ненавижу', 'bad', 'terrible', 'angry', 'hate', 'disappointed'],
-            'sadness': ['грустно', 'печально', 'разочарование', 'sad', 'disappointed', 'unhappy'],
-            'surprise': ['удивительно', 'неожиданно', 'шокирован', 'surprising', 'unexpected', 'shocked'],
-            'fear': ['беспокоюсь', 'боюсь', 'опасаюсь', 'worry', 'fear', 'concerned']
-        }
+        # Простая эвристика: доля ключевых слов каждой эмоции, найденных в тексте
+        found = {kw for _, kw in EMOTION_AUTOMATON.iter(text.lower())}
         
-        intensities = {}
-        for emotion, keywords in emotion_keywords.items():
-            count = sum(1 for word in keywords if word in text_lower)
-            intensities[emotion] = min(1.0, count * 0.2)  # Максимум 1.0
+        intensities = {emotion: 0 for emotion in EMOTION_KEYWORDS}
+        for kw in found:
+            for emotion in KEYWORD_EMOTIONS[kw]:
+                intensities[emotion] += 1
+        intensities = {k: min(1.0, count * 0.2) for k, count in intensities.items()}  # Максимум 1.0
         
         # Нормализация
         total = sum(intensities.values())
         if total > 0:
             intensities = {k: v/total for k, v in intensities.items()}
         
-        return intensities
\ No newline at end of file
+        return intensities
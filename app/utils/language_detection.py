@@ -0,0 +1,27 @@
+"""
+Определение языка отзыва (ru/en) по алфавиту
+"""
+import re
+
+_CYRILLIC_RE = re.compile(r"[Ѐ-ӿ]")
+_LATIN_RE = re.compile(r"[A-Za-z]")
+
+# Для решения достаточно начала текста
+SAMPLE_LENGTH = 200
+
+def detect_language(text: str) -> str:
+    """
+    Определение языка по соотношению кириллических и латинских букв
+    
+    Args:
+        text: Текст для анализа
+        
+    Returns:
+        'ru' или 'en'; при отсутствии букв - 'ru' (приоритетный язык)
+    """
+    sample = text[:SAMPLE_LENGTH]
+    cyrillic = len(_CYRILLIC_RE.findall(sample))
+    latin = len(_LATIN_RE.findall(sample))
+    return 'en' if latin > cyrillic else 'ru'
+
+__all__ = ["detect_language"]
@@ -1,38 +1,105 @@
 ﻿import structlog
 import logging
 import sys
+import time
+
+import orjson
+
+from app.config import settings
+
+# Формат записей сторонних библиотек (uvicorn, SQLAlchemy, Celery),
+# которые продолжают писать через stdlib logging
+LIBRARY_LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+def _configure_library_logging(level: int):
+    """Один обработчик stdout на корневом логгере stdlib"""
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter(LIBRARY_LOG_FORMAT))
+    
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(level)
+
+def _make_timestamper():
+    """
+    Процессор метки времени в формате ISO UTC, как у TimeStamper(fmt="iso", utc=True)
+
+    Строка с точностью до секунды форматируется заново только при смене
+    секунды, к ней дописываются микросекунды.
+    """
+    # Секунда и её строка хранятся одним кортежем, чтобы потоки
+    # не прочитали их из разных секунд
+    cached = (None, "")
+
+    def add_timestamp(logger, method_name, event_dict):
+        nonlocal cached
+        now = time.time()
+        second = int(now)
+        # Округление микросекунд как в datetime.fromtimestamp
+        micros = round((now - second) * 1e6)
+        if micros >= 1000000:
+            second += 1
+            micros -= 1000000
+        cached_second, prefix = cached
+        if second != cached_second:
+            prefix = time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(second))
+            cached = (second, prefix)
+        # isoformat() опускает нулевую дробную часть
+        event_dict["timestamp"] = f"{prefix}.{micros:06d}Z" if micros else f"{prefix}Z"
+        return event_dict
+
+    return add_timestamp
+
+_format_exc_info = structlog.processors.format_exc_info
+_render_stack_info = structlog.processors.StackInfoRenderer()
+
+def _maybe_exc_info(logger, method_name, event_dict):
+    """Форматирование исключения только для записей с exc_info"""
+    if "exc_info" in event_dict:
+        return _format_exc_info(logger, method_name, event_dict)
+    return event_dict
+
+def _maybe_stack_info(logger, method_name, event_dict):
+    """Стек вызовов только для записей с stack_info=True"""
+    if "stack_info" in event_dict:
+        return _render_stack_info(logger, method_name, event_dict)
+    return event_dict
+
+# Конфигурация выполняется один раз на процесс: модуль импортируют
+# и API, и воркеры Celery, а при reload/pytest вызов повторяется
+_CONFIGURED = False
 
 def configure_logging():
-   # Configure structured logging with structlog.
-    # Очистка существующих обработчиков
-    for handler in logging.root.handlers[:]:
-        logging.root.removeHandler(handler)
+    # Configure structured logging with structlog.
+    global _CONFIGURED
+    if _CONFIGURED:
+        return
     
-    # Базовая конфигурация logging
-    logging.basicConfig(
-        format="%(message)s",
-        stream=sys.stdout,
-        level=logging.INFO
-    )
+    level = logging.DEBUG if settings.DEBUG else logging.INFO
     
-    # Конфигурация structlog
+    _configure_library_logging(level)
+    
+    # Конфигурация structlog: события пишутся в stdout напрямую,
+    # минуя обработчики stdlib logging
     structlog.configure(
         processors=[
-            structlog.stdlib.filter_by_level,
-            structlog.stdlib.add_logger_name,
-            structlog.stdlib.add_log_level,
-            structlog.stdlib.PositionalArgumentsFormatter(),
-            structlog.processors.TimeStamper(fmt="iso"),
-            structlog.processors.StackInfoRenderer(),
-            structlog.processors.format_exc_info,
-            structlog.processors.UnicodeDecoder(),
-            structlog.processors.JSONRenderer()  # JSON формат для логов
+            structlog.contextvars.merge_contextvars,
+            structlog.processors.add_log_level,
+            _make_timestamper(),
+            _maybe_stack_info,
+            _maybe_exc_info,
+            structlog.processors.JSONRenderer(serializer=orjson.dumps)  # JSON формат для логов
         ],
         context_class=dict,
-        logger_factory=structlog.stdlib.LoggerFactory(),
-        wrapper_class=structlog.stdlib.BoundLogger,
+        # Файл фиксируется при настройке: воркер Celery подменяет sys.stdout
+        # на LoggingProxy без .buffer, а фабрика по умолчанию берёт
+        # sys.stdout.buffer при первом использовании логгера
+        logger_factory=structlog.BytesLoggerFactory(file=sys.__stdout__.buffer),
+        wrapper_class=structlog.make_filtering_bound_logger(level),
         cache_logger_on_first_use=True,
     )
+    
+    _CONFIGURED = True
 
 # Экспорт функции для импорта
 __all__ = ["configure_logging"]
@@ -0,0 +1,320 @@
+"""
+Хранилище rate limiting для slowapi: локальные счётчики в процессе
+с периодической синхронизацией скользящего окна через Redis
+"""
+import math
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional, Tuple
+
+import redis
+from cachetools import TTLCache
+from fastapi import HTTPException, Request, Response
+from limits.storage import MovingWindowSupport, Storage
+import structlog
+
+logger = structlog.get_logger()
+
+# Очистка окна, добавление новых записей и подсчёт - за один вызов EVALSHA
+SYNC_WINDOW_SCRIPT = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local expiry = tonumber(ARGV[2])
+local amount = tonumber(ARGV[3])
+redis.call('ZREMRANGEBYSCORE', key, 0, now - expiry)
+for i = 1, amount do
+    redis.call('ZADD', key, now, ARGV[4] .. ':' .. i)
+end
+redis.call('EXPIRE', key, expiry)
+return redis.call('ZCARD', key)
+"""
+
+
+class _Window:
+    """Состояние скользящего окна одного ключа в текущем процессе"""
+
+    __slots__ = ("hits", "pending", "remote", "synced_at", "expiry")
+
+    def __init__(self, expiry: int):
+        self.hits: Deque[float] = deque()  # Локальные попадания в окне
+        self.pending = 0  # Попадания, ещё не отправленные в Redis
+        self.remote = 0  # Общее число попаданий по данным Redis
+        self.synced_at = 0.0  # Время последней успешной синхронизации
+        self.expiry = expiry  # Длина окна в секундах
+
+
+class LocalSyncedStorage(Storage, MovingWindowSupport):
+    """
+    Хранилище лимитов в памяти процесса
+
+    Решение о лимите принимается локально, запрос никогда не ждёт Redis.
+    Накопленные попадания отправляет фоновый поток: раз в sync_interval
+    секунд или раньше, если по ключу набралось sync_every попаданий.
+    Каждый ключ синхронизируется одним Lua-скриптом. Без Redis работает
+    как чисто локальное хранилище.
+
+    Вызовы Redis ограничены socket_timeout и выполняются без блокировки
+    счётчиков. После ошибки синхронизация приостанавливается на
+    retry_interval секунд, на время паузы лимит считается только по
+    локальным попаданиям.
+    """
+
+    STORAGE_SCHEME = ["custom"]
+
+    def __init__(
+        self,
+        uri: Optional[str] = None,
+        redis_url: Optional[str] = None,
+        sync_every: int = 50,
+        sync_interval: float = 1.0,
+        retry_interval: float = 5.0,
+        socket_timeout: float = 0.1,
+        maxsize: int = 10000,
+        ttl: int = 3600,
+        **options,
+    ):
+        super().__init__(uri, **options)
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.retry_interval = retry_interval
+        self._retry_at = 0.0  # Пауза синхронизации после ошибки Redis
+        self._windows: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._counters: TTLCache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flusher_pid: Optional[int] = None
+        self._redis = (
+            redis.Redis.from_url(
+                redis_url,
+                socket_timeout=socket_timeout,
+                socket_connect_timeout=socket_timeout,
+            )
+            if redis_url
+            else None
+        )
+        self._sync_script = (
+            self._redis.register_script(SYNC_WINDOW_SCRIPT) if self._redis else None
+        )
+
+    @property
+    def base_exceptions(self):
+        return redis.RedisError
+
+    # Фиксированное окно (стратегии fixed-window)
+
+    def incr(self, key: str, expiry: int, amount: int = 1, **kwargs) -> int:
+        now = time.time()
+        with self._lock:
+            value, expires_at = self._counters.get(key, (0, now + expiry))
+            if expires_at <= now:
+                value, expires_at = 0, now + expiry
+            value += amount
+            self._counters[key] = (value, expires_at)
+            return value
+
+    def get(self, key: str) -> int:
+        value, expires_at = self._counters.get(key, (0, 0.0))
+        return value if expires_at > time.time() else 0
+
+    def get_expiry(self, key: str) -> float:
+        return self._counters.get(key, (0, time.time()))[1]
+
+    # Скользящее окно (стратегия moving-window)
+
+    def acquire_entry(self, key: str, limit: int, expiry: int, amount: int = 1) -> bool:
+        if amount > limit:
+            return False
+
+        now = time.time()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                window = self._windows[key] = _Window(expiry)
+            self._trim(window, now, expiry)
+
+            if self._estimate(window, now, expiry) + amount > limit:
+                return False
+
+            window.hits.extend([now] * amount)
+            window.pending += amount
+            if self._sync_script is not None:
+                self._ensure_flusher()
+                if window.pending >= self.sync_every:
+                    self._wake.set()
+            return True
+
+    def get_moving_window(self, key: str, limit: int, expiry: int) -> Tuple[float, int]:
+        now = time.time()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None:
+                return now, 0
+            self._trim(window, now, expiry)
+            start = window.hits[0] if window.hits else now
+            return start, self._estimate(window, now, expiry)
+
+    def check(self) -> bool:
+        if self._redis is None:
+            return True
+        try:
+            return bool(self._redis.ping())
+        except redis.RedisError:
+            return False
+
+    def reset(self) -> Optional[int]:
+        with self._lock:
+            cleared = len(self._windows) + len(self._counters)
+            self._windows.clear()
+            self._counters.clear()
+        return cleared
+
+    def clear(self, key: str) -> None:
+        with self._lock:
+            self._windows.pop(key, None)
+            self._counters.pop(key, None)
+        if self._redis is not None:
+            try:
+                self._redis.delete(self._redis_key(key))
+            except redis.RedisError as e:
+                logger.warning("rate_limit_clear_failed", key=key, error=str(e))
+
+    @staticmethod
+    def _trim(window: _Window, now: float, expiry: int) -> None:
+        """Удаление локальных попаданий, вышедших за окно"""
+        threshold = now - expiry
+        while window.hits and window.hits[0] <= threshold:
+            window.hits.popleft()
+        # Неотправленные попадания старше окна уже не влияют на лимит
+        window.pending = min(window.pending, len(window.hits))
+
+    def _estimate(self, window: _Window, now: float, expiry: int) -> int:
+        """Оценка общего числа попаданий в окне с учётом других процессов"""
+        if (
+            self._sync_script is None
+            or now < self._retry_at
+            or now - window.synced_at >= expiry
+        ):
+            return len(window.hits)
+        return max(len(window.hits), window.remote + window.pending)
+
+    @staticmethod
+    def _redis_key(key: str) -> str:
+        return f"ratelimit:{key}"
+
+    def _ensure_flusher(self) -> None:
+        """Запуск фонового потока синхронизации в текущем процессе"""
+        # Потоки не переживают fork, поэтому воркер запускает свой поток
+        # при первом попадании
+        pid = os.getpid()
+        if self._flusher_pid == pid:
+            return
+        self._flusher_pid = pid
+        self._wake = threading.Event()
+        threading.Thread(
+            target=self._flush_loop, name="rate-limit-sync", daemon=True
+        ).start()
+
+    def _flush_loop(self) -> None:
+        while True:
+            self._wake.wait(self.sync_interval)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Отправка накопленных попаданий всех ключей в Redis
+
+        Под блокировкой снимается только список окон с неотправленными
+        попаданиями; скрипт выполняется без неё, поэтому проверка лимита
+        в запросах не ждёт сети.
+        """
+        now = time.time()
+        if self._sync_script is None or now < self._retry_at:
+            return
+
+        with self._lock:
+            batch = [
+                (key, window, window.pending)
+                for key, window in list(self._windows.items())
+                if window.pending
+            ]
+
+        for key, window, amount in batch:
+            try:
+                remote = int(
+                    self._sync_script(
+                        keys=[self._redis_key(key)],
+                        args=[now, window.expiry, amount, uuid.uuid4().hex],
+                    )
+                )
+            except redis.RedisError as e:
+                self._retry_at = now + self.retry_interval
+                logger.warning("rate_limit_sync_failed", key=key, error=str(e))
+                return
+
+            with self._lock:
+                window.remote = remote
+                # Попадания, пришедшие во время вызова, уйдут в следующий раз
+                window.pending = max(window.pending - amount, 0)
+                window.synced_at = now
+
+
+def make_checker(
+    storage: MovingWindowSupport,
+    limit: int,
+    window: int,
+    key_fn: Callable[[Request], str],
+    scope: str,
+) -> Callable[[Request, Response], Awaitable[None]]:
+    """
+    Зависимость FastAPI со скользящим окном, специализированная для маршрута
+
+    Лимит, окно, функция ключа и префикс связываются в замыкании один раз
+    при регистрации роутера, запрос выполняет только вызов acquire_entry.
+    Пропущенные запросы получают заголовки X-RateLimit-Limit,
+    X-RateLimit-Remaining и X-RateLimit-Reset, ответ 429 - те же
+    заголовки и Retry-After.
+
+    Args:
+        storage: Хранилище с поддержкой скользящего окна
+        limit: Допустимое число запросов в окне
+        window: Длина окна в секундах
+        key_fn: Ключ клиента по запросу (например, IP-адрес)
+        scope: Имя группы маршрутов, у каждой группы свои счётчики
+
+    Returns:
+        Асинхронная зависимость, отвечающая 429 при превышении лимита
+    """
+    acquire = storage.acquire_entry
+    get_window = storage.get_moving_window
+    prefix = f"LIMITER/{scope}/"
+    detail = f"Rate limit exceeded: {limit} per {window} seconds"
+    limit_header = str(limit)
+
+    async def check(request: Request, response: Response) -> None:
+        key = prefix + key_fn(request)
+        allowed = acquire(key, limit, window)
+        start, count = get_window(key, limit, window)
+        reset = start + window
+
+        if not allowed:
+            raise HTTPException(
+                status_code=429,
+                detail=detail,
+                headers={
+                    "Retry-After": str(max(math.ceil(reset - time.time()), 1)),
+                    "X-RateLimit-Limit": limit_header,
+                    "X-RateLimit-Remaining": "0",
+                    "X-RateLimit-Reset": str(int(reset)),
+                },
+            )
+
+        headers = response.headers
+        headers["X-RateLimit-Limit"] = limit_header
+        headers["X-RateLimit-Remaining"] = str(max(limit - count, 0))
+        headers["X-RateLimit-Reset"] = str(int(reset))
+
+    return check
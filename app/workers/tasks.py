@@ -1,16 +1,23 @@
 """
 Celery задачи для асинхронной обработки
 """
-from celery import Celery
-from celery.result import AsyncResult
-from typing import List
-import logging
+from celery import Celery, states
+from celery.signals import worker_process_init
+from dataclasses import dataclass
+from typing import Any, List, Optional
+import asyncio
+from sqlalchemy import text
+import structlog
+import uvloop
 
 from app.config import settings
-from app.database import SessionLocal
-from app.services.analysis import ReviewAnalyzer
+from app.database import SessionLocal, engine
+from app.services.analysis import ReviewAnalyzer, get_analyzer
+from app.utils.logging import configure_logging
 
-logger = logging.getLogger(__name__)
+# Логи воркера идут через тот же orjson-конвейер structlog, что и у API
+configure_logging()
+logger = structlog.get_logger()
 
 # Инициализация Celery
 celery_app = Celery(
@@ -19,10 +26,59 @@ celery_app = Celery(
     backend=settings.CELERY_RESULT_BACKEND
 )
 
+# Анализ отзывов упирается в CPU (инференс моделей), а ввод-вывод с БД и Redis
+# уже выполняется асинхронно в event loop процесса. Очередь обслуживается
+# prefork-пулом: eventlet/gevent не ускорят инференс и несовместимы
+# с event loop asyncpg и потоками torch.
+ANALYSIS_QUEUE = 'review-analysis-queue'
+
 celery_app.conf.task_routes = {
-    'app.workers.tasks.*': 'review-analysis-queue'
+    'app.workers.tasks.*': ANALYSIS_QUEUE
 }
 
+# Задачи анализа сильно различаются по длительности: воркер берёт новую
+# задачу только когда освободился (запуск с -Ofair), подтверждение после выполнения
+celery_app.conf.update(
+    worker_prefetch_multiplier=1,
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    # worker_process_init загружает и прогревает модели (десятки секунд),
+    # а по умолчанию Celery ждёт готовности дочернего процесса 4 секунды
+    # и затем убивает его, после чего процесс перезапускается по кругу
+    worker_proc_alive_timeout=300,
+)
+
+# Event loop процесса воркера: соединения пула asyncpg привязаны к нему,
+# поэтому все задачи процесса выполняются в одном и том же цикле
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Анализатор с загруженными моделями, общий для всех задач процесса
+_ANALYZER: Optional[ReviewAnalyzer] = None
+
+# Размер части пачки: ограничивает память и время удержания соединения
+TASK_CHUNK_SIZE = 100
+
+def _run(coro):
+    """Выполнение корутины в event loop текущего процесса воркера"""
+    global _loop
+    if _loop is None:
+        # Тот же uvloop, что и у API (uvicorn --loop uvloop)
+        _loop = uvloop.new_event_loop()
+    return _loop.run_until_complete(coro)
+
+async def _warm_pool():
+    """Отказ от соединений родительского процесса и открытие собственного"""
+    await engine.dispose(close=False)
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    """Инициализация пула соединений и моделей в дочернем процессе воркера"""
+    global _ANALYZER
+    _run(_warm_pool())
+    _ANALYZER = get_analyzer()
+
 @celery_app.task(bind=True, max_retries=3)
 def analyze_review_batch(self, review_ids: List[int]):
     """
@@ -34,41 +90,77 @@ def analyze_review_batch(self, review_ids: List[int]):
     Returns:
         Словарь с результатами обработки
     """
+    summary = {'processed': 0, 'failed_ids': [], 'done': 0}
     try:
-        logger.info(f"Starting batch analysis for {len(review_ids)} reviews")
-        
-        # Создание сессии базы данных
-        db = SessionLocal()
-        analyzer = ReviewAnalyzer()
+        _run(_analyze_batch(review_ids, summary))
         
         results = {
             'total': len(review_ids),
-            'processed': 0,
-            'failed': 0,
-            'failed_ids': []
+            'processed': summary['processed'],
+            'failed': len(summary['failed_ids']),
+            'failed_ids': summary['failed_ids']
         }
         
-        # Обработка каждого отзыва
-        for review_id in review_ids:
-            try:
-                analyzer.analyze_and_save(review_id, db)
-                results['processed'] += 1
-            except Exception as e:
-                logger.error(f"Failed to analyze review {review_id}: {e}")
-                results['failed'] += 1
-                results['failed_ids'].append(review_id)
-        
-        db.close()
-        
-        logger.info(f"Batch analysis completed: {results}")
+        # Одна запись на пачку вместо записи на каждую ошибку
+        logger.info("batch_done", **results)
         
         return results
         
     except Exception as e:
-        logger.error(f"Batch analysis failed: {e}")
-        raise self.retry(exc=e, countdown=60)
+        logger.error(
+            "batch_failed", total=len(review_ids), done=summary['done'], error=repr(e)
+        )
+        # Зафиксированные части при повторе не анализируются заново
+        raise self.retry(args=(review_ids[summary['done']:],), exc=e, countdown=60)
+
+def enqueue_many(review_id_batches: List[List[int]]) -> List[str]:
+    """
+    Постановка нескольких задач анализа через одно соединение с брокером
+    
+    Args:
+        review_id_batches: Пачки ID отзывов, по одной задаче на пачку
+        
+    Returns:
+        Список ID поставленных задач
+    """
+    with celery_app.producer_pool.acquire(block=True) as producer:
+        return [
+            analyze_review_batch.apply_async(args=(batch,), producer=producer).id
+            for batch in review_id_batches
+        ]
+
+async def _analyze_batch(review_ids: List[int], summary: dict):
+    """
+    Анализ пачки отзывов частями по TASK_CHUNK_SIZE: на каждую часть
+    отдельная сессия, один SELECT, массовая вставка и фиксация
+    
+    Args:
+        review_ids: Список ID отзывов для анализа
+        summary: Накопитель результатов; 'done' — число ID в уже
+            зафиксированных частях
+    """
+    analyzer = _ANALYZER or get_analyzer()
+    for start in range(0, len(review_ids), TASK_CHUNK_SIZE):
+        chunk = review_ids[start:start + TASK_CHUNK_SIZE]
+        # Соединение возвращается в пул после каждой части; сессия
+        # откатывает незавершённую транзакцию даже при ошибке
+        async with SessionLocal() as db:
+            chunk_summary = await analyzer.analyze_batch(chunk, db)
+        
+        summary['processed'] += chunk_summary['processed']
+        summary['failed_ids'].extend(chunk_summary['failed_ids'])
+        summary['done'] = start + len(chunk)
+
+@dataclass(slots=True)
+class TaskStatus:
+    """Статус задачи Celery; сериализуется orjson без промежуточного словаря"""
+    task_id: str
+    status: str
+    result: Any
+    ready: bool
+    success: Optional[bool]
 
-def get_task_status(task_id: str) -> dict:
+def get_task_status(task_id: str) -> TaskStatus:
     """
     Получение статуса задачи
     
@@ -76,14 +168,17 @@ def get_task_status(task_id: str) -> dict:
         task_id: ID задачи Celery
         
     Returns:
-        Словарь со статусом задачи
+        Статус задачи
     """
-    task_result = AsyncResult(task_id, app=celery_app)
+    # Одно обращение к backend вместо отдельного на каждое свойство AsyncResult
+    meta = celery_app.backend.get_task_meta(task_id)
+    status = meta['status']
+    ready = status in states.READY_STATES
     
-    return {
-        'task_id': task_id,
-        'status': task_result.status,
-        'result': task_result.result if task_result.ready() else None,
-        'ready': task_result.ready(),
-        'success': task_result.successful() if task_result.ready() else None
-    }
\ No newline at end of file
+    return TaskStatus(
+        task_id=task_id,
+        status=status,
+        result=meta.get('result') if ready else None,
+        ready=ready,
+        success=status == states.SUCCESS if ready else None
+    )
\ No newline at end of file
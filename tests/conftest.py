@@ -0,0 +1,18 @@
+"""
+Общие фикстуры тестов
+"""
+import asyncio
+
+import pytest
+
+@pytest.fixture(scope="session")
+def event_loop():
+    """
+    Один event loop на всю сессию для фикстур уровня сессии
+
+    Определён здесь, а не в модуле тестов: иначе асинхронные тесты других
+    модулей завершаются после закрытия цикла, в котором работает lifespan.
+    """
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
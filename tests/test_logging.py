@@ -0,0 +1,58 @@
+"""
+Тесты настройки логирования
+"""
+import re
+import sys
+from datetime import datetime
+
+import orjson
+import structlog
+from celery import Celery
+
+from app.utils import logging as app_logging
+from app.utils.logging import _make_timestamper, configure_logging
+
+# Формат structlog.processors.TimeStamper(fmt="iso", utc=True)
+ISO_UTC_RE = re.compile(r"^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d{6})?Z$")
+
+def test_logging_after_worker_redirects_stdout(monkeypatch, capfd):
+    """Запись работает после подмены sys.stdout воркером Celery"""
+    configure_logging()
+    # monkeypatch восстановит исходные потоки после теста
+    monkeypatch.setattr(sys, "stdout", sys.stdout)
+    monkeypatch.setattr(sys, "stderr", sys.stderr)
+    Celery().log.redirect_stdouts()
+    assert not hasattr(sys.stdout, "buffer")
+
+    structlog.get_logger().info("batch_done", total=3)
+
+    record = orjson.loads(capfd.readouterr().out.splitlines()[-1])
+    assert record["event"] == "batch_done"
+    assert record["total"] == 3
+
+def test_timestamper_matches_iso_utc_format(monkeypatch):
+    """Метка времени совпадает с форматом TimeStamper(fmt="iso", utc=True)"""
+    moments = iter([1760000000.5, 1760000000.000042, 1760000001.25, 1760000001.9999996])
+    monkeypatch.setattr(app_logging.time, "time", lambda: next(moments))
+    add_timestamp = _make_timestamper()
+
+    stamps = [add_timestamp(None, "info", {})["timestamp"] for _ in range(4)]
+
+    assert all(ISO_UTC_RE.match(stamp) for stamp in stamps)
+    assert stamps == [
+        "2025-10-09T08:53:20.500000Z",
+        "2025-10-09T08:53:20.000042Z",
+        "2025-10-09T08:53:21.250000Z",
+        # Округление до следующей секунды и целая секунда без дробной части,
+        # как у datetime.isoformat()
+        "2025-10-09T08:53:22Z",
+    ]
+
+def test_timestamper_agrees_with_structlog():
+    """Строка совпадает с TimeStamper с точностью до секунды"""
+    ours = _make_timestamper()(None, "info", {})["timestamp"]
+    theirs = structlog.processors.TimeStamper(fmt="iso", utc=True)(None, "info", {})["timestamp"]
+
+    assert ISO_UTC_RE.match(theirs)
+    parse = lambda stamp: datetime.fromisoformat(stamp.replace("Z", "+00:00"))
+    assert abs((parse(theirs) - parse(ours)).total_seconds()) < 1
@@ -0,0 +1,79 @@
+"""
+Тесты моделей и фильтра мягкого удаления
+"""
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+
+from app.models import AnalysisResult, Base, Review
+
+@pytest_asyncio.fixture
+async def session():
+    """Сессия на отдельной базе SQLite в памяти"""
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with AsyncSession(engine, expire_on_commit=False) as db:
+        yield db
+
+    await engine.dispose()
+
+@pytest_asyncio.fixture
+async def reviews(session):
+    """Активный и мягко удалённый отзывы с результатами анализа"""
+    active = Review(text="Хороший товар", language="ru")
+    deleted = Review(text="Bad product", language="en")
+    deleted.soft_delete()
+    session.add_all([active, deleted])
+    await session.flush()
+
+    session.add_all([
+        AnalysisResult(review_id=active.id, sentiment="positive", confidence=0.9),
+        AnalysisResult(review_id=active.id, sentiment="neutral", confidence=0.5, is_deleted=True),
+    ])
+    await session.commit()
+    session.expunge_all()
+    return active.id, deleted.id
+
+@pytest.mark.asyncio
+async def test_is_deleted_defaults_to_false(session):
+    """Новая запись не помечена удалённой"""
+    review = Review(text="Text")
+    session.add(review)
+    await session.commit()
+
+    assert review.is_deleted is False
+
+@pytest.mark.asyncio
+async def test_select_excludes_soft_deleted(session, reviews):
+    """SELECT и session.get не возвращают мягко удалённые записи"""
+    active_id, deleted_id = reviews
+
+    result = await session.execute(select(Review))
+    assert [review.id for review in result.scalars()] == [active_id]
+    assert await session.get(Review, deleted_id) is None
+
+@pytest.mark.asyncio
+async def test_relationship_excludes_soft_deleted(session, reviews):
+    """Связанные результаты анализа тоже фильтруются"""
+    active_id, _ = reviews
+
+    review = await session.get(Review, active_id)
+    assert [result.sentiment for result in review.analysis] == ["positive"]
+
+@pytest.mark.asyncio
+async def test_include_deleted_option(session, reviews):
+    """Опция include_deleted=True отключает фильтр"""
+    active_id, deleted_id = reviews
+
+    result = await session.execute(
+        select(Review).execution_options(include_deleted=True).order_by(Review.id)
+    )
+    assert [review.id for review in result.scalars()] == [active_id, deleted_id]
+
+    review = await session.get(
+        Review, deleted_id, execution_options={"include_deleted": True}
+    )
+    assert review is not None and review.is_deleted
@@ -0,0 +1,78 @@
+"""
+Тесты NLP-компонентов
+"""
+import pytest
+
+from app.services.nlp.phrases import KeyPhraseExtractor
+from app.services.nlp.sentiment import SentimentAnalyzer
+from app.utils.language_detection import detect_language
+
+@pytest.fixture(scope="module")
+def analyzer():
+    """Анализатор без моделей transformers"""
+    return SentimentAnalyzer(use_transformers=False)
+
+@pytest.mark.parametrize("text, expected", [
+    ("Отличный продукт, очень доволен", "ru"),
+    ("Great product, very happy", "en"),
+    ("Телефон iPhone пришёл быстро", "ru"),
+    ("Ordered the 'Спутник' model, works fine", "en"),
+])
+def test_detect_language(text, expected):
+    """Язык определяется по преобладающему алфавиту"""
+    assert detect_language(text) == expected
+
+@pytest.mark.parametrize("text", ["", "12345 !!!", "😀👍"])
+def test_detect_language_without_letters(text):
+    """Текст без букв относится к русскому языку"""
+    assert detect_language(text) == "ru"
+
+def test_lexicon_polarity_sign():
+    """Полярность положительна для похвалы и отрицательна для жалобы"""
+    assert SentimentAnalyzer._lexicon_polarity("Отличный товар, рекомендую") > 0
+    assert SentimentAnalyzer._lexicon_polarity("terrible and slow") < 0
+    assert SentimentAnalyzer._lexicon_polarity("обычная коробка") == 0
+
+def test_lexicon_polarity_negation():
+    """Отрицание перед словом меняет его знак"""
+    assert SentimentAnalyzer._lexicon_polarity("not good") < 0
+    assert SentimentAnalyzer._lexicon_polarity("не плохо") > 0
+    # Отрицание действует только на следующее слово
+    assert SentimentAnalyzer._lexicon_polarity("not sure, good") > 0
+
+def test_lexicon_polarity_smoothing():
+    """Одно слово не даёт крайней оценки"""
+    assert SentimentAnalyzer._lexicon_polarity("good") == pytest.approx(1 / 3)
+
+def test_emotion_intensity_shared_keyword(analyzer):
+    """'disappointed' учитывается и как гнев, и как грусть"""
+    intensities = analyzer._calculate_emotion_intensity("I am disappointed", "en")
+
+    assert intensities["anger"] == pytest.approx(0.5)
+    assert intensities["sadness"] == pytest.approx(0.5)
+    assert intensities["joy"] == 0
+
+def test_emotion_intensity_without_keywords(analyzer):
+    """Без ключевых слов все интенсивности нулевые"""
+    intensities = analyzer._calculate_emotion_intensity("Обычная посылка", "ru")
+
+    assert set(intensities.values()) == {0}
+
+def test_key_phrases_split_by_polarity():
+    """Фрагменты отзыва распределяются по знаку оценки"""
+    phrases = KeyPhraseExtractor().extract_key_phrases(
+        "Отличная камера, но батарея плохая", "neutral"
+    )
+
+    assert phrases == {"positive": ["Отличная камера"], "negative": ["батарея плохая"]}
+
+def test_key_phrases_without_lexicon_words():
+    """Без оценочных слов короткий отзыв относится к общей тональности"""
+    extractor = KeyPhraseExtractor()
+
+    assert extractor.extract_key_phrases("Пришло вовремя", "positive") == {
+        "positive": ["Пришло вовремя"], "negative": []
+    }
+    assert extractor.extract_key_phrases("Обычная коробка", "neutral") == {
+        "positive": [], "negative": []
+    }
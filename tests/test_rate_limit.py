@@ -0,0 +1,176 @@
+"""
+Тесты rate limiting: хранилище и проверка маршрутов
+"""
+import asyncio
+import threading
+
+import pytest
+import redis
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from slowapi.util import get_remote_address
+
+from app.utils import rate_limit
+from app.utils.rate_limit import LocalSyncedStorage, make_checker
+
+class FakeClock:
+    """Управляемое время для rate_limit.time.time"""
+
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Подмена времени в модуле rate_limit"""
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limit.time, "time", fake)
+    return fake
+
+def synced_storage(**options) -> LocalSyncedStorage:
+    """Хранилище с Redis без фонового потока: синхронизация через flush()"""
+    storage = LocalSyncedStorage(redis_url="redis://localhost:6379/0", **options)
+    storage._ensure_flusher = lambda: None
+    return storage
+
+def test_acquire_entry_within_limit(clock):
+    """Запросы до лимита проходят, сверх лимита отклоняются"""
+    storage = LocalSyncedStorage()
+
+    assert all(storage.acquire_entry("ip", 3, 60) for _ in range(3))
+    assert not storage.acquire_entry("ip", 3, 60)
+    # Счётчики разных ключей независимы
+    assert storage.acquire_entry("other", 3, 60)
+
+def test_moving_window_expires(clock):
+    """Попадания покидают окно по истечении его длины"""
+    storage = LocalSyncedStorage()
+    storage.acquire_entry("ip", 2, 60)
+    clock.now += 30
+    storage.acquire_entry("ip", 2, 60)
+
+    assert storage.get_moving_window("ip", 2, 60) == (1000.0, 2)
+    assert not storage.acquire_entry("ip", 2, 60)
+
+    # Первое попадание вышло из окна
+    clock.now += 31
+    assert storage.get_moving_window("ip", 2, 60) == (1030.0, 1)
+    assert storage.acquire_entry("ip", 2, 60)
+
+def test_get_moving_window_unknown_key(clock):
+    """Для неизвестного ключа окно пустое"""
+    storage = LocalSyncedStorage()
+
+    assert storage.get_moving_window("ip", 10, 60) == (clock.now, 0)
+
+def test_remote_count_limits_across_processes(clock):
+    """Счётчик из Redis учитывает попадания других процессов"""
+    storage = synced_storage()
+    storage._sync_script = lambda keys, args: 10
+
+    assert storage.acquire_entry("ip", 10, 60)
+    storage.flush()
+    assert not storage.acquire_entry("ip", 10, 60)
+
+def test_requests_never_call_redis_inline(clock):
+    """Запросы реже sync_interval не вызывают скрипт в своём потоке"""
+    storage = LocalSyncedStorage(redis_url="redis://localhost:6379/0", sync_every=5)
+    threads = []
+    flushed = threading.Event()
+
+    def script(keys, args):
+        threads.append(threading.current_thread())
+        flushed.set()
+        return args[2]
+
+    storage._sync_script = script
+
+    # Раньше каждый такой запрос синхронизировался сам
+    for _ in range(3):
+        assert storage.acquire_entry("slow", 100, 60)
+        clock.now += 2
+    assert threads == []
+
+    # Частый ключ будит фоновый поток, не дожидаясь sync_interval
+    for _ in range(5):
+        assert storage.acquire_entry("fast", 100, 60)
+    assert flushed.wait(5)
+    assert threading.main_thread() not in threads
+
+def test_redis_failure_falls_back_to_local_hits(clock):
+    """При недоступном Redis лимит считается по локальным попаданиям"""
+    storage = synced_storage()
+    calls = []
+
+    def failing_script(keys, args):
+        calls.append(args)
+        raise redis.ConnectionError("connection refused")
+
+    storage._sync_script = failing_script
+
+    # 6 запросов в минуту при лимите 10 в минуту в течение 10 минут
+    for _ in range(60):
+        assert storage.acquire_entry("ip", 10, 60)
+        storage.flush()
+        clock.now += 10
+
+    window = storage._windows["ip"]
+    assert window.pending <= len(window.hits) <= 10
+    # Повторные попытки не чаще одной за retry_interval
+    assert len(calls) <= 600 / storage.retry_interval + 1
+
+def test_redis_recovery_resumes_sync(clock):
+    """После паузы синхронизация возобновляется и сбрасывает накопленное"""
+    storage = synced_storage(retry_interval=5.0)
+
+    def failing_script(keys, args):
+        raise redis.ConnectionError("connection refused")
+
+    storage._sync_script = failing_script
+    storage.acquire_entry("ip", 10, 60)
+    storage.flush()
+
+    sent = []
+    storage._sync_script = lambda keys, args: sent.append(args[2]) or 2
+    clock.now += 1
+    storage.acquire_entry("ip", 10, 60)
+    storage.flush()
+    assert sent == []  # Пауза после ошибки ещё не прошла
+
+    clock.now += 5
+    storage.acquire_entry("ip", 10, 60)
+    storage.flush()
+    assert sent == [3]
+    assert storage._windows["ip"].pending == 0
+
+@pytest.mark.asyncio
+async def test_checker_parallel_burst():
+    """Из параллельной серии N + k запросов ровно k получают 429"""
+    limit, extra = 20, 5
+    app = FastAPI()
+    checker = make_checker(
+        LocalSyncedStorage(), limit=limit, window=60,
+        key_fn=get_remote_address, scope="test"
+    )
+
+    @app.post("/limited/", dependencies=[Depends(checker)])
+    async def limited():
+        return {"status": "ok"}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        responses = await asyncio.gather(
+            *(client.post("/limited/") for _ in range(limit + extra))
+        )
+
+    accepted = [r for r in responses if r.status_code == 200]
+    rejected = [r for r in responses if r.status_code == 429]
+    assert len(accepted) == limit
+    assert len(rejected) == extra
+
+    assert all(r.headers["X-RateLimit-Limit"] == str(limit) for r in accepted)
+    assert sorted(int(r.headers["X-RateLimit-Remaining"]) for r in accepted) == list(range(limit))
+    for response in rejected:
+        assert int(response.headers["Retry-After"]) >= 1
+        assert response.headers["X-RateLimit-Remaining"] == "0"